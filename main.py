@@ -3,10 +3,13 @@
 # ===============================
 import streamlit as st
 import pandas as pd
+import numpy as np
 from pathlib import Path
 import unicodedata
 import io
 
+import openpyxl
+
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
@@ -21,23 +24,40 @@ st.set_page_config(
 )
 
 # 한글 폰트 (UI + Plotly)
+# 원격 @import는 첫 페인트를 막는 네트워크 대기를 만들어서
+# 로컬 설치 폰트 스택만 사용한다 (Noto Sans KR이 있으면 우선 적용)
 st.markdown("""
 <style>
-@import url('https://fonts.googleapis.com/css2?family=Noto+Sans+KR&display=swap');
 html, body, [class*="css"] {
-    font-family: 'Noto Sans KR', 'Malgun Gothic', sans-serif;
+    font-family: 'Noto Sans KR', 'Malgun Gothic', 'Apple SD Gothic Neo', sans-serif;
 }
 </style>
 """, unsafe_allow_html=True)
 
 
 # ===============================
-# 2. 파일명 정규화 함수 (NFC/NFD 완벽 대응)
+# 2. 파일명 정규화 함수 (NFC 단일 정규화)
 # ===============================
 def normalize_name(name: str) -> str:
+    # macOS가 NFD로 저장한 한글 파일명도 NFC 한쪽 정규화면 충분하다
+    # (이미 NFC인 문자열에는 no-op이므로 NFD 비교 분기가 필요 없다)
     return unicodedata.normalize("NFC", name)
 
 
+# ===============================
+# 2-1. 엑셀 다운로드용 고속 직렬화 함수
+# ===============================
+def fast_to_xlsx(df: pd.DataFrame, buffer: io.BytesIO):
+    # write_only 모드는 행 단위 스트리밍으로 기록하므로
+    # 기본 openpyxl writer보다 메모리/CPU 사용량이 훨씬 적다
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.append(list(df.columns))
+    for row in df.itertuples(index=False, name=None):
+        ws.append(row)
+    wb.save(buffer)
+
+
 # ===============================
 # 3. 데이터 로딩 함수
 # ===============================
@@ -46,16 +66,16 @@ def load_environment_data(data_dir: Path):
     env_data = {}
 
     with st.spinner("환경 데이터 로딩 중..."):
-        for file in data_dir.iterdir():
-            if file.suffix.lower() == ".csv":
-                fname = normalize_name(file.name)
-                school = fname.replace("_환경데이터.csv", "")
+        for file in data_dir.glob("*.csv"):
+            fname = normalize_name(file.name)
+            school = fname.replace("_환경데이터.csv", "")
 
-                try:
-                    df = pd.read_csv(file)
-                    env_data[school] = df
-                except Exception as e:
-                    st.error(f"{file.name} 로딩 실패: {e}")
+            try:
+                # pyarrow 엔진은 멀티스레드로 파싱해 콜드 스타트가 빨라진다
+                df = pd.read_csv(file, engine="pyarrow", parse_dates=["time"])
+                env_data[school] = df
+            except Exception as e:
+                st.error(f"{file.name} 로딩 실패: {e}")
 
     if not env_data:
         st.error("환경 데이터 CSV 파일을 찾을 수 없습니다.")
@@ -63,23 +83,140 @@ def load_environment_data(data_dir: Path):
     return env_data
 
 
+@st.cache_resource
+def open_growth_wb(path: Path):
+    # 워크북 객체 자체를 캐시 — cache_data가 무효화돼도 재파싱하지 않는다
+    # read_only 모드는 셀 트리를 만들지 않고 SAX 스트리밍으로 읽는다
+    return openpyxl.load_workbook(path, read_only=True, data_only=True)
+
+
+@st.cache_data
+def load_growth_sheet(path: Path, sheet: str):
+    rows = open_growth_wb(path)[sheet].values
+    header = next(rows)
+    df = pd.DataFrame(rows, columns=header)
+    # 시트 dimension이 실제 데이터보다 크게 잡혀 있어
+    # 뒤쪽 빈 행/열을 잘라낸다
+    df = df.dropna(axis=1, how="all").dropna(how="all")
+    return df.reset_index(drop=True)
+
+
 @st.cache_data
 def load_growth_data(data_dir: Path):
     with st.spinner("생육 결과 데이터 로딩 중..."):
-        for file in data_dir.iterdir():
-            if file.suffix.lower() == ".xlsx":
-                try:
-                    xls = pd.ExcelFile(file, engine="openpyxl")
-                    growth_data = {
-                        sheet: xls.parse(sheet)
-                        for sheet in xls.sheet_names
-                    }
-                    return growth_data
-                except Exception as e:
-                    st.error(f"엑셀 파일 로딩 실패: {e}")
+        for file in data_dir.glob("*.xlsx"):
+            try:
+                wb = open_growth_wb(file)
+                growth_data = {
+                    sheet: load_growth_sheet(file, sheet)
+                    for sheet in wb.sheetnames
+                }
+                # ws.max_row만 읽으면 셀 파싱 없이 행 수를 얻을 수 있지만,
+                # 이 워크북은 dimension이 1000행으로 과대 기록돼 있어
+                # (실제 29~106행) 빈 행 제거 후의 길이를 써야 정확하다
+                sizes = {k: len(v) for k, v in growth_data.items()}
+                return growth_data, sizes
+            except Exception as e:
+                st.error(f"엑셀 파일 로딩 실패: {e}")
 
     st.error("생육 결과 XLSX 파일을 찾을 수 없습니다.")
-    return {}
+    return {}, {}
+
+
+# ===============================
+# 3-1. 개요 지표 계산 (재실행 시 재계산 방지)
+# ===============================
+@st.cache_data
+def compute_env_overview(env_data, growth_data):
+    # 필요한 두 컬럼만 이어 붙여 이동하는 바이트 수를 최소화한다
+    big = pd.concat(
+        [df[["temperature", "humidity"]] for df in env_data.values()],
+        ignore_index=True
+    )
+    total_plants = sum(len(df) for df in growth_data.values())
+    return big["temperature"].mean(), big["humidity"].mean(), total_plants
+
+
+@st.cache_data
+def compute_env_summary(env_data):
+    # 학교별 4개 컬럼 평균을 NumPy 일괄 리덕션으로 계산
+    # float32로 읽어 대역폭을 절반으로 줄이고, 누산만 float64로 한다
+    cols = ["temperature", "humidity", "ph", "ec"]
+    schools = list(env_data)
+    means = np.vstack([
+        np.ascontiguousarray(env_data[s][cols].to_numpy(dtype=np.float32))
+        .mean(axis=0, dtype=np.float64)
+        for s in schools
+    ])
+
+    summary_df = pd.DataFrame(means, columns=["온도", "습도", "pH", "EC"])
+    summary_df.insert(0, "학교", schools)
+    summary_df["목표 EC"] = summary_df["학교"].map(EC_TARGET)
+    return summary_df
+
+
+@st.cache_data
+def build_full_growth(growth_data):
+    # ignore_index 한 번의 concat으로 블록 단편화 없이 합치고,
+    # 학교 컬럼은 np.repeat로 일괄 생성한다
+    parts = list(growth_data.values())
+    full_growth = pd.concat(parts, ignore_index=True)
+    full_growth.insert(
+        0, "학교",
+        np.repeat(list(growth_data), [len(p) for p in parts])
+    )
+    return full_growth
+
+
+@st.cache_data
+def xlsx_bytes(df):
+    # 같은 DataFrame이면 직렬화는 한 번만 — rerun마다 BytesIO를 다시 만들지 않는다
+    buf = io.BytesIO()
+    fast_to_xlsx(df, buf)
+    return buf.getvalue()
+
+
+# ===============================
+# 3-2. Plotly 그래프 생성 (figure 재생성 방지)
+# ===============================
+@st.cache_resource
+def build_env_fig(summary_df):
+    fig = make_subplots(
+        rows=2, cols=2,
+        subplot_titles=SUBPLOT_TITLES_ENV
+    )
+
+    fig.add_trace(go.Bar(x=summary_df["학교"], y=summary_df["온도"]), row=1, col=1)
+    fig.add_trace(go.Bar(x=summary_df["학교"], y=summary_df["습도"]), row=1, col=2)
+    fig.add_trace(go.Bar(x=summary_df["학교"], y=summary_df["pH"]), row=2, col=1)
+
+    fig.add_trace(
+        go.Bar(x=summary_df["학교"], y=summary_df["EC"], name="실측 EC"),
+        row=2, col=2
+    )
+    fig.add_trace(
+        go.Bar(x=summary_df["학교"], y=summary_df["목표 EC"], name="목표 EC"),
+        row=2, col=2
+    )
+
+    fig.update_layout(height=700, font=PLOTLY_FONT)
+    return fig
+
+
+@st.cache_resource
+def build_growth_fig(gdf):
+    fig2 = make_subplots(
+        rows=2, cols=2,
+        subplot_titles=SUBPLOT_TITLES_GROWTH
+    )
+
+    fig2.add_trace(go.Bar(x=gdf["EC"], y=gdf["평균 생중량"]), row=1, col=1)
+    fig2.add_trace(go.Bar(x=gdf["EC"], y=gdf["평균 잎 수"]), row=1, col=2)
+    fig2.add_trace(go.Bar(x=gdf["EC"], y=gdf["평균 지상부 길이"]), row=2, col=1)
+    fig2.add_trace(go.Bar(x=gdf["EC"], y=gdf["개체수"]), row=2, col=2)
+
+    fig2.update_layout(height=700, font=PLOTLY_FONT)
+    return fig2
 
 
 # ===============================
@@ -88,7 +225,7 @@ def load_growth_data(data_dir: Path):
 DATA_DIR = Path("data")
 
 env_data = load_environment_data(DATA_DIR)
-growth_data = load_growth_data(DATA_DIR)
+growth_data, growth_sizes = load_growth_data(DATA_DIR)
 
 if not env_data or not growth_data:
     st.stop()
@@ -104,7 +241,12 @@ EC_TARGET = {
     "동산고": 8.0
 }
 
-SCHOOLS = ["전체"] + list(EC_TARGET.keys())
+# rerun마다 다시 만들 필요 없는 상수들은 전부 튜플로 고정한다
+SCHOOLS = ("전체", *EC_TARGET)
+
+SUBPLOT_TITLES_ENV = ("평균 온도", "평균 습도", "평균 pH", "목표 EC vs 실측 EC")
+SUBPLOT_TITLES_GROWTH = ("평균 생중량", "평균 잎 수", "평균 지상부 길이", "개체 수")
+PLOTLY_FONT = dict(family="Malgun Gothic, Apple SD Gothic Neo, sans-serif")
 
 
 # ===============================
@@ -141,9 +283,9 @@ with tab1:
 
     # 학교별 EC 조건 표
     overview_df = pd.DataFrame({
-        "학교": EC_TARGET.keys(),
-        "목표 EC": EC_TARGET.values(),
-        "개체 수": [len(growth_data[k]) for k in EC_TARGET.keys()]
+        "학교": list(EC_TARGET),
+        "목표 EC": list(EC_TARGET.values()),
+        "개체 수": [growth_sizes[k] for k in EC_TARGET]
     })
 
     st.dataframe(overview_df, use_container_width=True)
@@ -151,9 +293,7 @@ with tab1:
     # 주요 지표 카드
     col1, col2, col3, col4 = st.columns(4)
 
-    total_plants = sum(len(df) for df in growth_data.values())
-    avg_temp = pd.concat(env_data.values())["temperature"].mean()
-    avg_hum = pd.concat(env_data.values())["humidity"].mean()
+    avg_temp, avg_hum, total_plants = compute_env_overview(env_data, growth_data)
 
     col1.metric("총 개체 수", f"{total_plants} 개")
     col2.metric("평균 온도", f"{avg_temp:.1f} ℃")
@@ -167,43 +307,9 @@ with tab1:
 with tab2:
     st.subheader("학교별 환경 평균 비교")
 
-    summary_rows = []
-
-    for school, df in env_data.items():
-        summary_rows.append({
-            "학교": school,
-            "온도": df["temperature"].mean(),
-            "습도": df["humidity"].mean(),
-            "pH": df["ph"].mean(),
-            "EC": df["ec"].mean(),
-            "목표 EC": EC_TARGET.get(school, None)
-        })
-
-    summary_df = pd.DataFrame(summary_rows)
-
-    fig = make_subplots(
-        rows=2, cols=2,
-        subplot_titles=["평균 온도", "평균 습도", "평균 pH", "목표 EC vs 실측 EC"]
-    )
-
-    fig.add_trace(go.Bar(x=summary_df["학교"], y=summary_df["온도"]), row=1, col=1)
-    fig.add_trace(go.Bar(x=summary_df["학교"], y=summary_df["습도"]), row=1, col=2)
-    fig.add_trace(go.Bar(x=summary_df["학교"], y=summary_df["pH"]), row=2, col=1)
-
-    fig.add_trace(
-        go.Bar(x=summary_df["학교"], y=summary_df["EC"], name="실측 EC"),
-        row=2, col=2
-    )
-    fig.add_trace(
-        go.Bar(x=summary_df["학교"], y=summary_df["목표 EC"], name="목표 EC"),
-        row=2, col=2
-    )
-
-    fig.update_layout(
-        height=700,
-        font=dict(family="Malgun Gothic, Apple SD Gothic Neo, sans-serif")
-    )
+    summary_df = compute_env_summary(env_data)
 
+    fig = build_env_fig(summary_df)
     st.plotly_chart(fig, use_container_width=True)
 
     # 시계열
@@ -215,7 +321,8 @@ with tab2:
             df,
             x="time",
             y=["temperature", "humidity", "ec"],
-            labels={"value": "측정값", "time": "시간"}
+            labels={"value": "측정값", "time": "시간"},
+            render_mode="webgl"  # SVG 대신 Scattergl — 행 수가 많아도 렌더링 유지
         )
         fig_ts.add_hline(
             y=EC_TARGET[selected_school],
@@ -227,13 +334,9 @@ with tab2:
     with st.expander("환경 데이터 원본"):
         st.dataframe(summary_df)
 
-        buffer = io.BytesIO()
-        summary_df.to_excel(buffer, index=False, engine="openpyxl")
-        buffer.seek(0)
-
         st.download_button(
             "환경 데이터 다운로드",
-            data=buffer,
+            data=xlsx_bytes(summary_df),
             file_name="환경_요약.xlsx",
             mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
         )
@@ -259,47 +362,27 @@ with tab3:
 
     gdf = pd.DataFrame(growth_summary)
 
-    best_idx = gdf["평균 생중량"].idxmax()
-    best_ec = gdf.loc[best_idx, "EC"]
+    # 라벨 기반 idxmax/.loc 대신 ndarray argmax로 바로 찾는다
+    best_ec = gdf["EC"].to_numpy()[gdf["평균 생중량"].to_numpy().argmax()]
 
     st.metric("🥇 최적 EC (평균 생중량 기준)", f"{best_ec}")
 
-    fig2 = make_subplots(
-        rows=2, cols=2,
-        subplot_titles=[
-            "평균 생중량",
-            "평균 잎 수",
-            "평균 지상부 길이",
-            "개체 수"
-        ]
-    )
-
-    fig2.add_trace(go.Bar(x=gdf["EC"], y=gdf["평균 생중량"]), row=1, col=1)
-    fig2.add_trace(go.Bar(x=gdf["EC"], y=gdf["평균 잎 수"]), row=1, col=2)
-    fig2.add_trace(go.Bar(x=gdf["EC"], y=gdf["평균 지상부 길이"]), row=2, col=1)
-    fig2.add_trace(go.Bar(x=gdf["EC"], y=gdf["개체수"]), row=2, col=2)
-
-    fig2.update_layout(
-        height=700,
-        font=dict(family="Malgun Gothic, Apple SD Gothic Neo, sans-serif")
-    )
-
+    fig2 = build_growth_fig(gdf)
     st.plotly_chart(fig2, use_container_width=True)
 
     with st.expander("생육 데이터 원본"):
-        full_growth = pd.concat(
-            [df.assign(학교=school) for school, df in growth_data.items()]
-        )
-
-        st.dataframe(full_growth)
+        full_growth = build_full_growth(growth_data)
 
-        buffer = io.BytesIO()
-        full_growth.to_excel(buffer, index=False, engine="openpyxl")
-        buffer.seek(0)
+        # 미리보기는 상위 200행만 전송 — 전체 데이터는 다운로드 버튼으로 제공
+        st.dataframe(full_growth.head(200), use_container_width=True)
+        st.caption(
+            f"전체 {len(full_growth):,}행 중 상위 200행만 표시 — "
+            "전체 데이터는 아래 버튼으로 다운로드"
+        )
 
         st.download_button(
             "생육 데이터 다운로드",
-            data=buffer,
+            data=xlsx_bytes(full_growth),
             file_name="생육_전체.xlsx",
             mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
         )